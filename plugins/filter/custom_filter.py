@@ -23,7 +23,7 @@ Functions:
 - drop_attributes(d, x): Removes specified attributes from a dictionary.
 - to_dict(x, key): Converts a sequence or a value into a dictionary.
 - merge_item(item, key_attr): Merges an item's attributes into a dictionary.
-- key_item(item, key_attr, remove_key): Converts an item into a key-value pair, optionally removing the key attribute.
+- key_item(item, key_attr, remove_key, copy_item): Converts an item into a key-value pair, optionally removing the key attribute.
 - dict_to_list(d, key_attr): Converts a dictionary into a list of merged items.
 - list_to_dict(l, key_attr, remove_key): Converts a list into a dictionary, keying items by specified attributes.
 - to_kv(d, sep, prefix): Converts a nested dictionary or list into a flat key-value pair representation.
@@ -44,17 +44,25 @@ These functions are designed to assist in data manipulation and processing tasks
 where data structures need to be dynamically created, modified, or converted between different formats.
 """
 
-import copy
 import functools
+import ipaddress
 import itertools
+import operator
 import re
-from collections import defaultdict
-from collections.abc import Sequence
+import socket
+import sys
+from collections.abc import Mapping, Sequence
 
-import netaddr
 import yaml
 from markupsafe import soft_str
 
+try:
+    from yaml import CSafeDumper as SafeDumper
+except ImportError:
+    from yaml import SafeDumper
+
+_OCTETS = tuple(str(i) for i in range(256))
+
 
 def is_hash(data):
     """
@@ -81,9 +89,7 @@ def merge_dicts(x, y):
     Returns:
     dict: A new dictionary containing the merged key-value pairs.
     """
-    z = x.copy()
-    z.update(y)
-    return z
+    return {**x, **y}
 
 
 def merge_dicts_reverse(x, y):
@@ -98,7 +104,7 @@ def merge_dicts_reverse(x, y):
     Returns:
     dict: A new dictionary with merged key-value pairs, prioritizing 'x' over 'y'.
     """
-    return merge_dicts(y, x)  # pylint: disable=arguments-out-of-order
+    return {**y, **x}
 
 
 def filename(basename):
@@ -111,7 +117,7 @@ def filename(basename):
     Returns:
     str: The filename without the extension.
     """
-    return basename.split(".")[0]
+    return basename.partition(".")[0]
 
 
 def map_format(value, pattern):
@@ -121,14 +127,8 @@ def map_format(value, pattern):
         {{ "%s - %s" | map_format("hello") }}
             -> hello - hello
     """
-    if is_hash(value) and is_hash(pattern):
-
-        def constant_factory(value):
-            return lambda: value
-
-        p = defaultdict(constant_factory("%s"))
-        p.update(pattern)
-        result = {k: map_format(v, p[k]) for k, v in value.items()}
+    if isinstance(value, Mapping) and isinstance(pattern, Mapping):
+        result = {k: map_format(v, pattern.get(k, "%s")) for k, v in value.items()}
     else:
         try:
             count = pattern.count("%s")
@@ -161,13 +161,9 @@ def reverse_record(record):
     Returns:
     dict: A new dictionary with reversed 'ip-address' and 'host', and a 'type' key set to "PTR".
     """
-
-    def reverse_address(addr):
-        rev = ".".join(addr.split(".")[::-1])
-        return f"{rev}.in-addr.arpa"
-
+    rev = ".".join(record["ip-address"].split(".")[::-1])
     return {
-        "host": reverse_address(record["ip-address"]),
+        "host": f"{rev}.in-addr.arpa",
         "ip-address": record["host"],
         "type": "PTR",
     }
@@ -184,7 +180,7 @@ def with_ext(basename, ext):
     Returns:
     str: The basename with the appended extension.
     """
-    return f"{filename(basename)}.{ext}"
+    return f"{basename.partition('.')[0]}.{ext}"
 
 
 def zone_fwd(zone, servers):
@@ -268,9 +264,9 @@ def alias_keys(d, alias=None):
     Args:
     d (dict): The original dictionary
     """
-    new_dict = copy.deepcopy(d)
+    new_dict = dict(d)
     _alias = alias or {}
-    for k, v in list(_alias.items()):
+    for k, v in _alias.items():
         new_dict[v] = new_dict[k]
     return new_dict
 
@@ -286,11 +282,7 @@ def map_attributes(d, atts):
     Returns:
     list: A list of values corresponding to the keys in atts found in d.
     """
-    new_array = []
-    for k in atts:
-        if k in d:
-            new_array = new_array + [d[k]]
-    return new_array
+    return [d[k] for k in atts if k in d]
 
 
 def select_attributes(d, atts):
@@ -305,11 +297,14 @@ def select_attributes(d, atts):
     Returns:
     dict: A new dictionary containing only the selected key-value pairs.
     """
-    new_dict = {}
-    for k, _ in list(d.items()):
-        if k in atts:
-            new_dict[k] = d[k]
-    return new_dict
+    # strings keep their substring membership semantics
+    keys = atts if isinstance(atts, str) else _frozen(tuple(atts))
+    return {k: v for k, v in d.items() if k in keys}
+
+
+@functools.lru_cache(maxsize=256)
+def _frozen(keys):
+    return frozenset(keys)
 
 
 def drop_attributes(d, x):
@@ -323,11 +318,8 @@ def drop_attributes(d, x):
     Returns:
     dict: A new dictionary with the specified keys removed.
     """
-    new_dict = copy.deepcopy(d)
-    for y in list(itertools.chain.from_iterable([x])):
-        if y in d:
-            del new_dict[y]
-    return new_dict
+    drops = _frozen(tuple(x))
+    return {k: v for k, v in d.items() if k not in drops}
 
 
 def to_dict(x, key=None):
@@ -346,7 +338,7 @@ def to_dict(x, key=None):
     if key is None:
         result = dict(x)
     else:
-        if is_hash(key):
+        if isinstance(key, Mapping):
             result = {map_format(x, k): map_format(x, v) for k, v in key.items()}
         else:
             result = {key: x}
@@ -364,7 +356,36 @@ def merge_item(item, key_attr):
     return dict(merge_dicts(item[1], to_dict(item[0], key_attr)))
 
 
-def key_item(item, key_attr, remove_key=True):
+def _key_getter(key_attr, remove_key):
+    """
+    Returns a function that extracts the value of a key, or of nested keys, from an item.
+
+    Args:
+        key_attr (int, float, str, bool, list, tuple): The key, or the list of nested keys, to extract.
+        remove_key (bool): Whether the caller removes the key from the item, which is not supported for nested keys.
+
+    Returns:
+        function: A function taking an item and returning the value of 'key_attr' in it.
+
+    Raises:
+        ValueError: If 'remove_key' is True for nested attributes or if 'key_attr' is neither a scalar nor a list/tuple.
+    """
+    if isinstance(key_attr, (list, tuple)):
+        if remove_key:
+            raise ValueError("remove_key must be False for nested attributes")
+
+        def nested_key(item):
+            for k in key_attr:
+                item = item[k]
+            return item
+
+        return nested_key
+    if isinstance(key_attr, (int, float, str, bool)):
+        return operator.itemgetter(key_attr)
+    raise ValueError("key_attr must be scalar or list")
+
+
+def key_item(item, key_attr, remove_key=True, copy_item=True):
     """
     Extracts a value from the given item using a specified key or nested keys, and returns
     this value along with a modified copy of the original item.
@@ -376,11 +397,14 @@ def key_item(item, key_attr, remove_key=True):
       the value from the item. If it's a list or tuple, it is treated as nested keys.
     - remove_key (bool, optional): If True, the key is removed from the copied item.
       Default is True. Note: This option is not applicable for nested keys.
+    - copy_item (bool, optional): If False, the original item is returned as is when no key
+      is removed from it. Default is True.
 
     Returns:
     - list: A list containing two elements:
         1. The value extracted from the item using the key(s).
-        2. A deep copy of the item, potentially with the key removed.
+        2. A shallow copy of the item, potentially with the key removed, or the item itself
+           if 'copy_item' is False and no key was removed.
 
     Raises:
     - ValueError: If 'remove_key' is True for nested attributes or if 'key_attr' is
@@ -397,17 +421,10 @@ def key_item(item, key_attr, remove_key=True):
     Note:
     - The function assumes that the nested keys correctly point to a value in the item.
     """
-    new_item = copy.deepcopy(item)
-    if isinstance(key_attr, (list, tuple)):
-        if remove_key:
-            raise ValueError("remove_key must be False for nested attributes")
-        _nested_attr = functools.reduce(lambda x, k: x[k], key_attr, item)
-        return [_nested_attr, new_item]
-    if isinstance(key_attr, (int, float, str, bool)):
-        if remove_key:
-            del new_item[key_attr]
-        return [item[key_attr], new_item]
-    raise ValueError("key_attr must be scalar or list")
+    _attr = _key_getter(key_attr, remove_key)(item)
+    if remove_key:
+        return [_attr, {k: v for k, v in item.items() if k != key_attr}]
+    return [_attr, dict(item) if copy_item else item]
 
 
 def dict_to_list(d, key_attr):
@@ -421,7 +438,9 @@ def dict_to_list(d, key_attr):
     Returns:
         list: A list where each element is a merged version of the key-value pairs from `d`, transformed by `key_attr`.
     """
-    return [merge_item(item, key_attr) for item in d.items()]
+    if key_attr is None or isinstance(key_attr, Mapping):
+        return [merge_item(item, key_attr) for item in d.items()]
+    return [{**v, key_attr: k} for k, v in d.items()]
 
 
 def list_to_dict(dict_list, key_attr, remove_key=True):
@@ -435,13 +454,65 @@ def list_to_dict(dict_list, key_attr, remove_key=True):
 
     Returns:
         dict: A dictionary with keys derived from `key_attr` of each item in the list.
+
+    Raises:
+        ValueError: If 'remove_key' is True for nested attributes or if 'key_attr' is neither a scalar nor a list/tuple.
     """
-    return dict([key_item(x, key_attr, remove_key) for x in dict_list])
+    get_key = _key_getter(key_attr, remove_key)
+    if remove_key:
+        return {
+            get_key(x): {k: v for k, v in x.items() if k != key_attr} for x in dict_list
+        }
+    return {get_key(x): dict(x) for x in dict_list}
+
+
+def _leaf_paths(data, containers, children, sep, root):
+    """
+    Walks a nested structure without recursion and returns its leaves as (key, value) pairs,
+    where key is the compound key made by joining the keys leading to the leaf onto 'root' with 'sep'.
+
+    Args:
+        data (Any): The structure to walk.
+        containers (tuple): The types of the nodes to walk into, strings are always leaves.
+        children (function): Returns the (key, value) pairs of a container node.
+        sep (str): The separator between keys.
+        root (Any): The compound key of 'data', keys below an empty root are not prefixed.
+
+    Returns:
+        list: The (key, value) pairs of every leaf, in traversal order.
+
+    Raises:
+        ValueError: If the structure is nested deeper than the recursion limit, e.g. because it references itself.
+    """
+    if not isinstance(data, containers) or isinstance(data, str):
+        return [(root, data)]
+    max_depth = sys.getrecursionlimit()
+    leaves = []
+    append = leaves.append
+    stack = [(root, iter(children(data)))]
+    push = stack.append
+    while stack:
+        parent, it = stack[-1]
+        for k, v in it:
+            key = k if parent == "" else f"{parent}{sep}{k}"
+            if not isinstance(v, containers) or isinstance(v, str):
+                append((key, v))
+                continue
+            # descend into v, the rest of this node is resumed from its iterator
+            if len(stack) >= max_depth:
+                raise ValueError(
+                    "Structure is nested too deeply, it may contain a circular reference"
+                )
+            push((key, iter(children(v))))
+            break
+        else:
+            stack.pop()
+    return leaves
 
 
 def to_kv(data, sep=".", prefix=""):
     """
-    Recursively converts a nested dictionary or list into a flat list of key-value pairs with compound keys.
+    Converts a nested dictionary or list into a flat list of key-value pairs with compound keys.
 
     Args:
         data (dict or list): The nested dictionary or list to flatten.
@@ -452,19 +523,16 @@ def to_kv(data, sep=".", prefix=""):
         list: A flat list of dictionaries,
               each containing a 'key' and 'value' pair representing the flattened structure.
     """
-    if is_hash(data):
-        lvl = [
-            to_kv(v, sep, (prefix != "" and (prefix + sep) or "") + k)
-            for k, v in data.items()
-        ]
-        return list(itertools.chain.from_iterable(lvl))
-    if isinstance(data, Sequence) and not isinstance(data, str):
-        lvl = [
-            to_kv(v, sep, (prefix != "" and (prefix + sep) or "") + str(i))
-            for i, v in list(enumerate(data))
-        ]
-        return list(itertools.chain.from_iterable(lvl))
-    return [{"key": prefix, "value": data}]
+
+    def children(node):
+        if isinstance(node, Mapping):
+            return node.items()
+        return zip(map(str, range(len(node))), node)
+
+    return [
+        {"key": key, "value": value}
+        for key, value in _leaf_paths(data, (Mapping, Sequence), children, sep, prefix)
+    ]
 
 
 def to_safe_yaml(ds):
@@ -476,8 +544,14 @@ def to_safe_yaml(ds):
 
     Returns:
         str: A YAML formatted string representing the input data structure.
+
+    Note:
+        Containers are dumped with libyaml when available, which writes empty string keys in
+        simple form and folds long double quoted strings differently, producing equivalent YAML.
     """
-    return yaml.safe_dump(ds)
+    # libyaml does not close scalar documents with an end marker, dump them with the python emitter
+    dumper = SafeDumper if isinstance(ds, (dict, list)) else yaml.SafeDumper
+    return yaml.dump(ds, Dumper=dumper, default_flow_style=False)
 
 
 def sorted_get(d, ks):
@@ -512,9 +586,28 @@ def ip_range(spec):
         list: A list of IP addresses within the specified range.
     """
     addrs = spec.split("-")
-    start = addrs[0]
-    end = start if len(addrs) == 1 else addrs[1]
-    return [str(ip) for ip in netaddr.iter_iprange(start, end)]
+    start = ipaddress.ip_address(addrs[0])
+    end = start if len(addrs) == 1 else ipaddress.ip_address(addrs[1])
+    if start.version != end.version:
+        raise ValueError(f"IP range {spec} mixes address families")
+    if start.version == 6:
+        if start.scope_id or end.scope_id:
+            raise ValueError(f"IP range {spec} contains scoped addresses")
+        # inet_ntop keeps the dotted quad form of ipv4 mapped and compatible addresses
+        return [
+            socket.inet_ntop(socket.AF_INET6, i.to_bytes(16, "big"))
+            for i in range(int(start), int(end) + 1)
+        ]
+    # expand one /24 block at a time: the block prefix is formatted once
+    # and last octets are taken from a precomputed table
+    first, last = int(start), int(end)
+    result = []
+    for block in range(first >> 8, (last >> 8) + 1):
+        prefix = f"{block >> 16}.{(block >> 8) & 0xFF}.{block & 0xFF}."
+        lo = max(first, block << 8) & 0xFF
+        hi = min(last, block << 8 | 0xFF) & 0xFF
+        result.extend([prefix + _OCTETS[i] for i in range(lo, hi + 1)])
+    return result
 
 
 def map_flatten(o, env=""):
@@ -536,33 +629,15 @@ def map_flatten(o, env=""):
     """
     if env == "" and not isinstance(o, dict):
         raise ValueError("Argument must be dictionary")
-    if isinstance(o, dict):
-        flattened = {}
-        for k, v in o.items():
-            if env == "":
-                newenv = k
-            else:
-                newenv = f"{env}.{k}"
-            if isinstance(v, (dict, list)):
-                item = map_flatten(v, newenv)
-            else:
-                item = {newenv: v}
-            flattened = {**flattened, **item}
-        return flattened
-    if isinstance(o, list):
-        flattened = {}
-        for i, j in enumerate(o):
-            if env == "":
-                newenv = f"{i}"
-            else:
-                newenv = f"{env}.{i}"
-            if isinstance(j, (dict, list)):
-                item = map_flatten(j, newenv)
-            else:
-                item = {newenv: j}
-            flattened = {**flattened, **item}
-        return flattened
-    return o
+    if not isinstance(o, (dict, list)):
+        return o
+
+    def children(node):
+        if isinstance(node, dict):
+            return node.items()
+        return zip(map(str, range(len(node))), node)
+
+    return dict(_leaf_paths(o, (dict, list), children, ".", env))
 
 
 def map_join(d, atts, sep=" "):
@@ -577,7 +652,7 @@ def map_join(d, atts, sep=" "):
     Returns:
         str: A single string made by joining the values of the specified keys in the dictionary.
     """
-    return sep.join([str(x) for x in map_attributes(d, atts)])
+    return sep.join(map(str, map_attributes(d, atts)))
 
 
 def merge_join(d, attr, atts, sep=" "):
@@ -618,29 +693,27 @@ def map_group(dict_list, key_atts, group_att=None):
         return x
 
     data_field = group_att or "data"
+    key_set = _frozen(tuple(key_atts))
     groups = {}
     for x in dict_list:
-        _key = tuple(map(map_tuple, map_attributes(x, key_atts)))
-        if _key in groups:
-            cur_item = groups[_key]
-            cur_data = cur_item[data_field]
+        if group_att is None:
+            item = {k: v for k, v in x.items() if k not in key_set}
+        elif group_att in x:
+            item = x[group_att]
         else:
-            cur_item = {}
-            cur_data = []
+            continue
+        _key = tuple(map(map_tuple, map_attributes(x, key_atts)))
         group_atts = select_attributes(x, key_atts)
-        if group_att is None:
-            groups[_key] = {
-                **cur_item,
-                **group_atts,
-                **{data_field: cur_data + [drop_attributes(x, key_atts)]},
-            }
+        group = groups.get(_key)
+        if group is None:
+            group = {**group_atts, data_field: []}
+            groups[_key] = group
         else:
-            if group_att in x:
-                groups[_key] = {
-                    **cur_item,
-                    **group_atts,
-                    **{data_field: cur_data + [x[group_att]]},
-                }
+            # rows can share a group without sharing every key attribute, merge all of them
+            data = group[data_field]
+            group.update(group_atts)
+            group[data_field] = data
+        group[data_field].append(item)
     return list(groups.values())
 
 
@@ -654,11 +727,7 @@ def is_any_true(xs):
     Returns:
         bool: True if any element in the iterable is true, False otherwise.
     """
-    return functools.reduce(
-        lambda x, y: x or y,
-        map(lambda x: bool(x), xs),  # pylint: disable=unnecessary-lambda
-        False,
-    )
+    return any(xs)
 
 
 def is_all_true(xs):
@@ -670,15 +739,13 @@ def is_all_true(xs):
 
     Returns:
         bool: True if all elements in the iterable are true, False otherwise.
-
-    Note:
-        This function uses a lambda function in conjunction with functools.reduce for evaluation.
     """
-    return functools.reduce(
-        lambda x, y: x and y,
-        map(lambda x: bool(x), xs),  # pylint: disable=unnecessary-lambda
-        True,
-    )
+    return all(xs)
+
+
+@functools.lru_cache(maxsize=512)
+def _compiled(regexp):
+    return re.compile(regexp)
 
 
 def search_regex(regexp, search_string):
@@ -692,18 +759,18 @@ def search_regex(regexp, search_string):
     Returns:
         bool: True if the string matches the regular expression pattern, False otherwise.
     """
-    return bool(re.match(regexp, search_string))
+    return bool(_compiled(regexp).match(search_string))
 
 
 def set_difference(value):
     """
-    Apply set difference operation to set pair:
+    Apply set difference operation to set pair, or to the first set of a longer list of sets:
     .. sourcecode:: jinja
         {{ [[['a', 'b', 'c], ['b', 'd']]] | map("map_difference") }}
             -> [['a', 'c']]
     """
-    [a, b] = value
-    return list(set(a).difference(set(b)))
+    [a, *rest] = value
+    return list(set(a).difference(*rest))
 
 
 def inner_product(value):
@@ -717,6 +784,42 @@ def inner_product(value):
     return [list(x) for x in itertools.product(a, b)]
 
 
+_FILTERS = {
+    "split_with": split_with,
+    "join_with": join_with,
+    "head": head,
+    "tail": tail,
+    "map_format": map_format,
+    "map_values": map_values,
+    "reverse_record": reverse_record,
+    "zone_fwd": zone_fwd,
+    "alias_keys": alias_keys,
+    "merge_dicts": merge_dicts,
+    "map_attributes": map_attributes,
+    "drop_attributes": drop_attributes,
+    "select_attributes": select_attributes,
+    "merge_dicts_reverse": merge_dicts_reverse,
+    "to_dict": to_dict,
+    "merge_item": merge_item,
+    "key_item": key_item,
+    "dict_to_list": dict_to_list,
+    "list_to_dict": list_to_dict,
+    "to_kv": to_kv,
+    "to_safe_yaml": to_safe_yaml,
+    "sorted_get": sorted_get,
+    "ip_range": ip_range,
+    "map_flatten": map_flatten,
+    "map_join": map_join,
+    "merge_join": merge_join,
+    "map_group": map_group,
+    "is_any_true": is_any_true,
+    "is_all_true": is_all_true,
+    "search_regex": search_regex,
+    "set_difference": set_difference,
+    "inner_product": inner_product,
+}
+
+
 class FilterModule:
     """
     A class encapsulating a collection of jinja2 filters.
@@ -774,37 +877,4 @@ class FilterModule:
             - inner_product: Return the cartesian product of a list-pair of lists
         """
 
-        return {
-            "split_with": split_with,
-            "join_with": join_with,
-            "head": head,
-            "tail": tail,
-            "map_format": map_format,
-            "map_values": map_values,
-            "reverse_record": reverse_record,
-            "zone_fwd": zone_fwd,
-            "alias_keys": alias_keys,
-            "merge_dicts": merge_dicts,
-            "map_attributes": map_attributes,
-            "drop_attributes": drop_attributes,
-            "select_attributes": select_attributes,
-            "merge_dicts_reverse": merge_dicts_reverse,
-            "to_dict": to_dict,
-            "merge_item": merge_item,
-            "key_item": key_item,
-            "dict_to_list": dict_to_list,
-            "list_to_dict": list_to_dict,
-            "to_kv": to_kv,
-            "to_safe_yaml": to_safe_yaml,
-            "sorted_get": sorted_get,
-            "ip_range": ip_range,
-            "map_flatten": map_flatten,
-            "map_join": map_join,
-            "merge_join": merge_join,
-            "map_group": map_group,
-            "is_any_true": is_any_true,
-            "is_all_true": is_all_true,
-            "search_regex": search_regex,
-            "set_difference": set_difference,
-            "inner_product": inner_product,
-        }
+        return _FILTERS
@@ -7,13 +7,24 @@ import re
 from collections.abc import MutableMapping
 
 import yaml
+from ansible import constants as C
 from ansible.errors import AnsibleParserError
 from ansible.inventory.manager import InventoryManager
 from ansible.module_utils.common.text.converters import to_text
 from ansible.plugins.inventory import BaseFileInventoryPlugin
+from ansible.utils.display import Display
 from ansible.utils.path import basedir
 from ansible.vars.plugins import get_vars_from_path
 
+try:
+    from yaml import CSafeLoader as SafeLoader
+except ImportError:
+    from yaml import SafeLoader
+
+    Display().vvv(
+        "PyYAML libyaml bindings not found, composite config detection will use the python loader"
+    )
+
 DOCUMENTATION = """
     name: composite_inventory
     plugin_type: inventory
@@ -26,15 +37,8 @@ DOCUMENTATION = """
             choices: ['nephelaiio.plugins.composite']
 """
 
-NoneType = type(None)
-
 GROUP_VARS = "group_vars"
 HOST_VARS = "host_vars"
-DICT_TYPES = (MutableMapping, NoneType)
-CANONICAL_PATHS: dict[str, str] = {}
-FOUND: dict[str, list[str]] = {}
-NAK: set[str] = set()
-PATH_CACHE: dict[tuple[str, str], str] = {}
 
 
 class InventoryModule(BaseFileInventoryPlugin):
@@ -42,10 +46,32 @@ class InventoryModule(BaseFileInventoryPlugin):
 
     NAME = "composite"
 
-    def _prefixed_group_name(self, group_name, prefix):
-        if not prefix:
-            return group_name
-        return f"{prefix}_{group_name}"
+    def __init__(self):
+        super().__init__()
+        # path lookups and child inventories are only memoized for the duration of a single parse
+        self._realpaths = {}
+        self._exists = {}
+        self._managers = {}
+
+    def _cached_realpath(self, path):
+        """Resolve the canonical path for path, resolving each path once per parse"""
+        if path not in self._realpaths:
+            self._realpaths[path] = os.path.realpath(path)
+        return self._realpaths[path]
+
+    def _cached_exists(self, path):
+        """Check whether path exists, issuing at most one stat call per path and parse"""
+        if path not in self._exists:
+            self._exists[path] = os.path.exists(path)
+        return self._exists[path]
+
+    def load_inventory(self, loader, source):
+        """Parse a child inventory source, parsing each source once per parse"""
+        if source not in self._managers:
+            manager = InventoryManager(loader=loader, sources=[source])
+            manager.parse_sources()
+            self._managers[source] = (manager, manager.get_groups_dict())
+        return self._managers[source]
 
     def verify_file(self, path):
         valid = False
@@ -53,25 +79,74 @@ class InventoryModule(BaseFileInventoryPlugin):
             _, file_ext = os.path.splitext(path)
             if file_ext in ["", ".yml", ".yaml"]:
                 try:
-                    with open(path, "r") as file:  # pylint: disable=unspecified-encoding
-                        data = yaml.safe_load(file)
-                        if data and isinstance(data, dict):
-                            has_plugin = "plugin" in data
-                            # regex match for plugin name
-                            is_plugin = re.match(rf".*{self.NAME}$", data.get("plugin"))
-                            return bool(has_plugin and is_plugin)
+                    with open(path, "rb") as file:
+                        data = yaml.load(file, Loader=SafeLoader)
+                    if data and isinstance(data, dict):
+                        has_plugin = "plugin" in data
+                        # regex match for plugin name
+                        is_plugin = re.match(rf".*{self.NAME}$", data.get("plugin"))
+                        return bool(has_plugin and is_plugin)
                 except Exception:  # pylint: disable=broad-except
                     pass
         return valid
 
+    def _inventory_ops(self, loader, source, prefix):
+        """Collect the group, group var, host and host var operations needed to merge a child inventory"""
+        manager, groups = self.load_inventory(loader, source)
+        manager_groups = manager.groups
+        get_host = manager.get_host
+        group_add_ops = []
+        group_var_ops = []
+        host_add_ops = []
+        host_var_ops = []
+        loaded_hosts = set()
+        # set_variable merges dict values under hash_behaviour=merge, so overridden vars can only be skipped on replace
+        hash_behaviour = C.config.get_config_value("DEFAULT_HASH_BEHAVIOUR")
+        skip_overridden = hash_behaviour == "replace"
+        for group_name, group_hosts in groups.items():
+            if group_name == "ungrouped":
+                continue
+            if group_name == prefix:
+                msg = f"Group name {group_name} conflicts with prefix {prefix}"
+                raise AnsibleParserError(msg)
+            prefix_group = prefix if group_name == "all" else prefix + "_" + group_name
+            group_add_ops.append((group_name, prefix_group))
+            group = manager_groups[group_name]
+            # load group_vars from group_vars directory, skipping vars overridden by inventory sources
+            group_vars = get_vars_from_path(loader, source, group, "task")
+            group_var_ops.extend(
+                (prefix_group, k, v)
+                for k, v in group_vars.items()
+                if not (skip_overridden and k in group.vars)
+            )
+            # load group_vars from inventory sources
+            group_var_ops.extend((prefix_group, k, v) for k, v in group.vars.items())
+            # register host
+            for host_name in group_hosts:
+                host_add_ops.append((host_name, prefix_group))
+                # host vars do not depend on the group, load them once per host
+                if host_name in loaded_hosts:
+                    continue
+                loaded_hosts.add(host_name)
+                host = get_host(host_name)
+                # load host_vars from host_vars directory, skipping vars overridden by inventory sources
+                host_vars = get_vars_from_path(loader, source, host, "task")
+                host_var_ops.extend(
+                    (host_name, k, v)
+                    for k, v in host_vars.items()
+                    if not (skip_overridden and k in host.vars)
+                )
+                # load host_vars from inventory sources
+                host_var_ops.extend((host_name, k, v) for k, v in host.vars.items())
+        return group_add_ops, group_var_ops, host_add_ops, host_var_ops
+
     def parse(self, inventory, loader, path, cache=True):
         super().parse(inventory, loader, path, cache)
-        self._read_config_data(path)
-
-        try:
-            data = self.loader.load_from_file(path)
-        except Exception as e:
-            raise AnsibleParserError(e) from e
+        self._realpaths = {}
+        self._exists = {}
+        self._managers = {}
+        # the validated config is the parsed document, reuse it instead of reading the file again
+        data = self._read_config_data(path)
 
         path_dir = basedir(path)
         group_vars_dir = os.path.join(path_dir, GROUP_VARS)
@@ -80,84 +155,59 @@ class InventoryModule(BaseFileInventoryPlugin):
         if not data:
             msg = f'Parsed empty YAML file "{to_text(path)}"'
             raise AnsibleParserError(msg)
-        if not data.get("inventories"):
+        if "inventories" not in data:
             msg = f'Parsed file "{to_text(path)}" does not contain "inventories" key'
             raise AnsibleParserError(msg)
-        if os.path.exists(group_vars_dir):
+        if self._cached_exists(group_vars_dir):
             msg = f"Directory {group_vars_dir} exists, group_vars should be defined in child inventories"
             raise AnsibleParserError(msg)
-        if os.path.exists(host_vars_dir):
+        if self._cached_exists(host_vars_dir):
             msg = f"Directory {host_vars_dir} exists, host_vars should be defined in child inventories"
             raise AnsibleParserError(msg)
 
-        inventories = data.get("inventories")
-        if not inventories or len(inventories) == 0:
+        inventories = data["inventories"]
+        if not inventories:
             msg = f'Parsed file "{to_text(path)}" does not contain any inventories'
             raise AnsibleParserError(msg)
+        set_variable = self.inventory.set_variable
+        add_host = self.inventory.add_host
+        children = []
         for subinventory in inventories:
-            _subinventory = to_text(subinventory)
-            if not isinstance(data, MutableMapping):
+            if not isinstance(subinventory, MutableMapping):
                 msg = f"YAML inventory has invalid structure, it should be a dictionary, got: {type(subinventory)}"
                 raise AnsibleParserError(msg)
-            if not subinventory.get("file"):
-                msg = f'Inventory "{_subinventory}" does not contain "file" key'
+            file = subinventory.get("file")
+            if not file:
+                msg = f'Inventory "{to_text(subinventory)}" does not contain "file" key'
                 raise AnsibleParserError(msg)
-            if not subinventory.get("prefix"):
-                msg = f'Inventory "{_subinventory}" does not contain "prefix" key'
+            prefix = subinventory.get("prefix")
+            if not prefix:
+                msg = (
+                    f'Inventory "{to_text(subinventory)}" does not contain "prefix" key'
+                )
                 raise AnsibleParserError(msg)
-            source = os.path.realpath(subinventory.get("file"))
-            if not os.path.exists(source):
+            source = self._cached_realpath(file)
+            if not self._cached_exists(source):
                 msg = f'File "{source}" does not exist'
                 raise AnsibleParserError(msg)
-            prefix = subinventory.get("prefix")
-            manager = InventoryManager(loader=loader, sources=[source])
-            manager.parse_sources()
-            groups = manager.get_groups_dict()
-            for group_name in groups:
-                if group_name == "ungrouped":
-                    continue
-                if group_name == prefix:
-                    msg = f"Group name {group_name} conflicts with prefix {prefix}"
-                    raise AnsibleParserError(msg)
-                if group_name == "all":
-                    prefix_group = prefix
-                else:
-                    prefix_group = self._prefixed_group_name(group_name, prefix)
+            children.append((source, prefix))
+        for source, prefix in children:
+            group_add_ops, group_var_ops, host_add_ops, host_var_ops = (
+                self._inventory_ops(loader, source, prefix)
+            )
+            for group_name, prefix_group in group_add_ops:
                 self.inventory.add_group(group_name)
                 self.inventory.add_group(prefix_group)
                 self.inventory.add_child(group_name, prefix_group)
-                group = manager.groups[group_name]
-                # load group_vars from group_vars directory
-                group_vars = get_vars_from_path(loader, source, group, "task")
-                for var_name in group_vars:
-                    var_value = group_vars[var_name]
-                    msg = f"Registered var {var_name} for group {prefix_group}"
-                    self.display.vvv(msg)
-                    self.inventory.set_variable(prefix_group, var_name, var_value)
-                # load group_vars from inventory sources
-                group_vars = group.vars
-                for var_name in group_vars:
-                    var_value = group_vars[var_name]
-                    msg = f"Registered var {var_name} for group {prefix_group}"
-                    self.display.vvv(msg)
-                    self.inventory.set_variable(prefix_group, var_name, var_value)
-                # register host
-                for host_name in groups[group_name]:
-                    host = manager.get_host(host_name)
-                    self.inventory.add_host(host_name, prefix_group)
-                    msg = f"Registered host {host_name} for group {group_name}"
-                    self.display.vvv(msg)
-                    # load host_vars from host_vars directory
-                    host_vars = get_vars_from_path(loader, source, host, "task")
-                    for var_name in host_vars:
-                        msg = f"Registered var {var_name} for host {host_name}"
-                        self.display.vvv(msg)
-                        var_value = host_vars[var_name]
-                        self.inventory.set_variable(host_name, var_name, var_value)
-                    # load host_vars from inventory sources
-                    host_vars = host.vars
-                    for var_name in host_vars:
-                        msg = f"Registered var {var_name} for host {host_name}"
-                        self.display.vvv(msg)
-                        var_value = host.vars[var_name]
-                        self.inventory.set_variable(host_name, var_name, var_value)
+            for group_var_op in group_var_ops:
+                set_variable(*group_var_op)
+            for host_add_op in host_add_ops:
+                add_host(*host_add_op)
+            for host_var_op in host_var_ops:
+                set_variable(*host_var_op)
+            if self.display.verbosity >= 3:
+                msg = (
+                    f"Registered {len(group_var_ops)} group vars, {len(host_add_ops)} host memberships "
+                    f"and {len(host_var_ops)} host vars from {source}"
+                )
+                self.display.vvv(msg)
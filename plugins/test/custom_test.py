@@ -5,6 +5,9 @@ Functions:
     test_network(record=None, net="0.0.0.0/0", prop="ansible_host"):
         Tests if an IP address in a given record falls within a specified network range.
 
+    test_networks(record=None, nets=("0.0.0.0/0",), prop="ansible_host"):
+        Tests if an IP address in a given record falls within any of the specified network ranges.
+
     test_property(record=None, regex=".*", prop=""):
         Tests if the value of a specified property in a given record matches a regular expression.
 
@@ -12,7 +15,7 @@ Classes:
     TestModule:
         Contains methods related to testing, encapsulating the test functions for easy access and organization.
 
-The module uses the 'netaddr' library to handle network address calculations and 're' for regex pattern matching.
+The module uses the standard 'ipaddress' library to handle network address calculations and 're' for regex pattern matching.
 It is designed to provide simple and flexible testing utilities that can be integrated into larger systems or used
 for quick checks and validations of network configurations or data records.
 
@@ -26,9 +29,47 @@ Example Usage:
     - 'TestModule' class can be instantiated to access these testing functions in a structured manner.
 """
 
+import bisect
+import functools
+import ipaddress
 import re
 
-from netaddr import IPAddress, IPNetwork
+
+@functools.lru_cache(maxsize=4096)
+def _compiled(regex):
+    return re.compile(regex)
+
+
+@functools.lru_cache(maxsize=1024)
+def _network(net):
+    network = ipaddress.ip_network(net, strict=False)
+    return network.version, int(network.network_address), int(network.broadcast_address)
+
+
+@functools.lru_cache(maxsize=65536)
+def _address(address):
+    ip = ipaddress.ip_address(address)
+    return ip.version, int(ip)
+
+
+@functools.lru_cache(maxsize=256)
+def _network_ranges(nets):
+    # merge networks into sorted, disjoint (first, last) bounds per address family
+    bounds = {4: [], 6: []}
+    for net in nets:
+        version, first, last = _network(net)
+        bounds[version].append((first, last))
+    ranges = {}
+    for version, version_bounds in bounds.items():
+        firsts, lasts = [], []
+        for first, last in sorted(version_bounds):
+            if lasts and first <= lasts[-1] + 1:
+                lasts[-1] = max(lasts[-1], last)
+            else:
+                firsts.append(first)
+                lasts.append(last)
+        ranges[version] = (firsts, lasts)
+    return ranges
 
 
 def test_network(record=None, net="0.0.0.0/0", prop="ansible_host"):
@@ -45,7 +86,36 @@ def test_network(record=None, net="0.0.0.0/0", prop="ansible_host"):
     """
 
     if record and prop in record:
-        if IPAddress(record[prop]) in IPNetwork(net):
+        version, address = _address(record[prop])
+        net_version, first, last = _network(net)
+        if version == net_version and first <= address <= last:
+            return record
+    return None
+
+
+def test_networks(record=None, nets=("0.0.0.0/0",), prop="ansible_host"):
+    """
+    Tests if the IP address in a given record falls within any of the specified network ranges.
+
+    Args:
+        record (dict, optional): The record containing the IP address to test. If None, the function returns None. Defaults to None.
+        nets (list or tuple, optional): The network ranges in CIDR notation to test the IP address against. Defaults to ("0.0.0.0/0",) (all IPv4 IPs).
+        prop (str, optional): The key in the record dict that holds the IP address. Defaults to "ansible_host".
+
+    Returns:
+        dict or None: The original record if its IP address falls within any of the specified network ranges, None otherwise.
+
+    Note:
+        Network ranges are merged and indexed once per distinct list of networks, each record is then matched with a binary search.
+    """
+
+    if record and prop in record:
+        if isinstance(nets, str):
+            nets = [nets]
+        version, address = _address(record[prop])
+        firsts, lasts = _network_ranges(tuple(nets))[version]
+        index = bisect.bisect_right(firsts, address) - 1
+        if index >= 0 and address <= lasts[index]:
             return record
     return None
 
@@ -64,7 +134,7 @@ def test_property(record=None, regex=".*", prop=""):
     """
 
     if record and prop in record:
-        if re.match(regex, record[prop]):
+        if _compiled(regex).match(record[prop]):
             return record
     return None
 
@@ -88,7 +158,11 @@ class TestModule:
         function objects themselves. This is useful for dynamically accessing and calling test functions.
 
         Returns:
-            dict: A dictionary mapping the names of test functions ('test_network', 'test_property') to the actual function objects.
+            dict: A dictionary mapping the names of test functions ('test_network', 'test_networks', 'test_property') to the actual function objects.
         """
 
-        return {"test_network": test_network, "test_property": test_property}
+        return {
+            "test_network": test_network,
+            "test_networks": test_networks,
+            "test_property": test_property,
+        }
@@ -1,3 +1,5 @@
+from collections import defaultdict
+
 import pytest
 from custom_filter import (  # noqa: E402
     alias_keys,
@@ -110,6 +112,9 @@ def test_select_attributes():
     assert select_attributes({"a": "0", "b": "1"}, []) == {}
     assert select_attributes({"a": "0", "b": "1"}, ["a", "b"]) == {"a": "0", "b": "1"}
     assert select_attributes({"a": "0"}, ["a", "b"]) == {"a": "0"}
+    selected = select_attributes({"a": 1, "b": 2, "c": 3}, ["c", "a"])
+    assert list(selected) == ["a", "c"]
+    assert select_attributes({"ab": 1, "c": 3}, "abc") == {"ab": 1, "c": 3}
 
 
 def test_drop_attributes():
@@ -162,6 +167,8 @@ def test_key_item():
     f = {"a": e}
     assert key_item(f, ["a", "b"], False) == ["second", f]
     assert key_item(f, ["a"], False) == [e, f]
+    assert key_item(f, ["a"], False)[1] is not f
+    assert key_item(f, ["a"], False, False)[1] is f
     with pytest.raises(KeyError):
         key_item(d, ["na"], False)
     with pytest.raises(ValueError):
@@ -174,6 +181,8 @@ def test_dict_to_list():
         {"key": "a", "content": "first"},
         {"key": "b", "content": "second"},
     ]
+    assert dict_to_list({"a": {"key": "x"}}, "key") == [{"key": "a"}]
+    assert dict_to_list(d, {"key": "%s"}) == dict_to_list(d, "key")
 
 
 def test_list_to_dict():
@@ -240,6 +249,15 @@ def test_to_kv():
         {"key": "a/0/d", "value": "e"},
         {"key": "a/1", "value": "h"},
     ]
+    shared = {"b": ["c"]}
+    assert to_kv({"a": shared, "d": [shared]}) == [
+        {"key": "a.b.0", "value": "c"},
+        {"key": "d.0.b.0", "value": "c"},
+    ]
+    cyclic = {"a": 1}
+    cyclic["b"] = cyclic
+    with pytest.raises(ValueError):
+        to_kv(cyclic)
 
 
 def test_to_safe_yaml():
@@ -247,6 +265,8 @@ def test_to_safe_yaml():
     assert to_safe_yaml({"a": 0}) == "a: 0\n"
     assert to_safe_yaml({"a": [0, 1]}) == "a:\n- 0\n- 1\n"
     assert to_safe_yaml({"a": 0, "b": 1}) == "a: 0\nb: 1\n"
+    assert to_safe_yaml("a") == "a\n...\n"
+    assert to_safe_yaml(1) == "1\n...\n"
 
 
 def test_sorted_get():
@@ -281,6 +301,14 @@ def test_sorted_get():
 def test_iprange():
     assert ip_range("8.8.8.8") == ["8.8.8.8"]
     assert ip_range("8.8.8.8-8.8.8.10") == ["8.8.8.8", "8.8.8.9", "8.8.8.10"]
+    assert ip_range("10.0.0.255-10.0.1.0") == ["10.0.0.255", "10.0.1.0"]
+    assert ip_range("::1-::2") == ["::1", "::2"]
+    assert ip_range("::ffff:1.2.3.4-::ffff:1.2.3.5") == [
+        "::ffff:1.2.3.4",
+        "::ffff:1.2.3.5",
+    ]
+    with pytest.raises(ValueError):
+        ip_range("fe80::1%eth0")
 
 
 def test_map_flatten():
@@ -303,6 +331,12 @@ def test_map_flatten():
         "e.1": "g",
     }
 
+    shared = {"b": [1]}
+    assert map_flatten({"a": shared, "c": [shared]}) == {
+        "a.b.0": 1,
+        "c.0.b.0": 1,
+    }
+
     with pytest.raises(ValueError):
         map_flatten("a")
 
@@ -341,6 +375,11 @@ def test_map_join():
     assert map_join(target, ["e", "b"], ",") == "chamo,hola"
 
     assert map_join(target, ["x"]) == ""
+    assert map_join(target, []) == ""
+    assert map_join(target, ["b", "x", "d"]) == "hola mundo"
+    counts = defaultdict(int, {"a": 1})
+    assert map_join(counts, ["a", "b"]) == "1"
+    assert "b" not in counts
 
 
 def test_merge_join():
@@ -450,6 +489,11 @@ def test_map_group():
         },
     ]
 
+    partial = [{"a": 1, "x": 1}, {"b": 1, "x": 2}]
+    assert map_group(partial, ["a", "b"]) == [
+        {"a": 1, "b": 1, "data": [{"x": 1}, {"x": 2}]},
+    ]
+
 
 def test_is_any_true():
     assert is_any_true(["a"]) is True
@@ -495,6 +539,7 @@ def test_set_difference():
     assert set(set_difference([["a", "b"], ["a", "d"]])).difference(set(["b"])) == set()
     assert set(set_difference([["a", "b"], ["b", "c"]])).difference(set(["a"])) == set()
     assert set(set_difference([["a", "b"], ["a", "b"]])).difference(set([])) == set()
+    assert set_difference([["a", "b", "c"], ["a"], ["c"]]) == ["b"]
 
 
 def test_inner_product():
@@ -1,4 +1,4 @@
-from custom_test import test_network, test_property  # noqa: E402
+from custom_test import test_network, test_networks, test_property  # noqa: E402
 
 
 def test_test_network():
@@ -9,6 +9,21 @@ def test_test_network():
     assert not test_network(r, "10.0.0.0/24")
     assert not test_network(r, "10.1.0.0/24")
     assert test_network(r, "10.0.0.0/24", "address") == r
+    assert test_network(r, "10.0.0.1/24", "address") == r
+    assert not test_network(r, "::/0", "address")
+
+
+def test_test_networks():
+    host = "test.com"
+    address = "10.0.0.1"
+    r = {"host": host, "address": address}
+    assert not test_networks(r)
+    assert not test_networks(r, ["10.0.0.0/24"])
+    assert not test_networks(r, ["10.1.0.0/24", "10.2.0.0/24"], "address")
+    assert not test_networks(r, ["::/0"], "address")
+    assert test_networks(r, ["10.1.0.0/24", "10.0.0.0/24"], "address") == r
+    assert test_networks(r, ["10.0.0.0/25", "10.0.0.0/8"], "address") == r
+    assert test_networks(r, "10.0.0.0/24", "address") == r
 
 
 def test_test_property():